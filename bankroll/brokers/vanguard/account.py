@@ -4,9 +4,10 @@ from collections import namedtuple
 from datetime import datetime
 from decimal import Decimal
 from enum import unique
-from functools import reduce
+from functools import lru_cache, reduce
 from pathlib import Path
 from typing import (
+    Callable,
     Dict,
     Iterable,
     List,
@@ -16,6 +17,8 @@ from typing import (
     Sequence,
     Set,
     Tuple,
+    TypeVar,
+    cast,
 )
 
 from bankroll.broker import AccountData, configuration, csvsectionslicer, parsetools
@@ -51,6 +54,40 @@ class Settings(configuration.Settings):
         return "Vanguard"
 
 
+_USD = Currency.USD
+
+# Most statement rows carry no fees. Cash is immutable, so share one instance.
+_ZERO_USD = Cash(currency=_USD, quantity=Decimal(0))
+
+_BOND_NAME_REGEX = re.compile(r".+\s%\s.+")
+
+
+# Statements repeat the same few amounts (e.g., "0.0" fees) across many rows, and
+# Decimal is immutable, so parsed values can be shared.
+@lru_cache(maxsize=4096)
+def _parseDecimal(s: str) -> Decimal:
+    return Decimal(s)
+
+
+_T = TypeVar("_T")
+_U = TypeVar("_U")
+
+
+# Parses rows like parsetools.lenientParse(), dropping None results in either
+# mode, but skips its per-row exception handling when it would only re-raise.
+def _parseRows(
+    xs: Iterable[_T], transform: Callable[[_T], Optional[_U]], lenient: bool
+) -> Iterable[_U]:
+    if lenient:
+        # lenientParse() already drops None results.
+        return cast(
+            Iterable[_U],
+            parsetools.lenientParse(xs, transform=transform, lenient=lenient),
+        )
+    else:
+        return (y for y in map(transform, xs) if y is not None)
+
+
 class PositionsAndActivity(NamedTuple):
     positions: List[Position]
     activity: List[Activity]
@@ -64,41 +101,64 @@ class _VanguardPosition(NamedTuple):
     totalValue: str
 
 
-class _VanguardPositionAndActivity(NamedTuple):
-    position: _VanguardPosition
-    activity: List[Activity]
-
-
 def _guessInstrumentForInvestmentName(name: str) -> Instrument:
     instrument: Instrument
-    if re.match(r"^.+\s\%\s.+$", name):
+    if _BOND_NAME_REGEX.match(name):
         # TODO: Determine valid CUSIP for bonds
-        instrument = Bond(name, currency=Currency.USD, validateSymbol=False)
+        instrument = Bond(name, currency=_USD, validateSymbol=False)
     else:
-        instrument = Stock(name, currency=Currency.USD)
+        instrument = Stock(name, currency=_USD)
 
     return instrument
 
 
-def _parseVanguardPositionAndActivity(vpb: _VanguardPositionAndActivity) -> Position:
-    return _parseVanguardPosition(vpb.position, vpb.activity)
+# Instruments built while parsing a single statement, keyed by symbol and
+# investment name. Instruments are mutable, so this must not outlive the parse.
+_InstrumentCache = Dict[Tuple[str, str], Instrument]
+
+
+# Statements mention the same handful of instruments on many rows, so reuse them
+# rather than re-running instrument validation for every row.
+def _instrumentForSymbolOrName(
+    symbol: str, investmentName: str, instruments: _InstrumentCache
+) -> Instrument:
+    key = (symbol, investmentName)
+    instrument = instruments.get(key)
+    if instrument is None:
+        if len(symbol) > 0:
+            instrument = Stock(symbol, currency=_USD)
+        else:
+            instrument = _guessInstrumentForInvestmentName(investmentName)
+
+        instruments[key] = instrument
+
+    return instrument
 
 
-def _activityAffectsSymbol(activity: Activity, symbol: str) -> bool:
+def _symbolsAffectedByActivity(activity: Activity) -> Set[str]:
     if isinstance(activity, CashPayment):
-        return activity.instrument is not None and activity.instrument.symbol == symbol
+        return {activity.instrument.symbol} if activity.instrument else set()
     elif isinstance(activity, Trade):
-        return (
-            isinstance(activity.instrument, Option)
-            and activity.instrument.underlying == symbol
-        ) or activity.instrument.symbol == symbol
+        if isinstance(activity.instrument, Option):
+            return {activity.instrument.symbol, activity.instrument.underlying}
+        else:
+            return {activity.instrument.symbol}
     else:
-        return False
+        return set()
+
+
+# Groups activity by every symbol it affects, so each position only needs to
+# look at its own activity instead of scanning all of it.
+def _activityBySymbol(activity: Iterable[Activity]) -> Dict[str, List[Activity]]:
+    result: Dict[str, List[Activity]] = {}
+    for a in activity:
+        for symbol in _symbolsAffectedByActivity(a):
+            result.setdefault(symbol, []).append(a)
 
+    return result
 
-def _realizedBasisForSymbol(
-    symbol: str, activity: Iterable[Activity]
-) -> Optional[Cash]:
+
+def _realizedBasis(activity: Iterable[Activity]) -> Optional[Cash]:
     def f(basis: Optional[Cash], activity: Activity) -> Optional[Cash]:
         if isinstance(activity, CashPayment):
             return basis - activity.proceeds if basis else -activity.proceeds
@@ -107,19 +167,19 @@ def _realizedBasisForSymbol(
         else:
             raise ValueError(f"Unexpected type of activity: {activity}")
 
-    return reduce(f, (t for t in activity if _activityAffectsSymbol(t, symbol)), None)
+    return reduce(f, activity, None)
 
 
-def _parseVanguardPosition(p: _VanguardPosition, activity: List[Activity]) -> Position:
-    instrument: Instrument
-    if len(p.symbol) > 0:
-        instrument = Stock(p.symbol, currency=Currency.USD)
-    else:
-        instrument = _guessInstrumentForInvestmentName(p.investmentName)
+def _parseVanguardPosition(
+    p: _VanguardPosition,
+    activityBySymbol: Mapping[str, Sequence[Activity]],
+    instruments: _InstrumentCache,
+) -> Position:
+    instrument = _instrumentForSymbolOrName(p.symbol, p.investmentName, instruments)
 
-    qty = Decimal(p.shares)
+    qty = _parseDecimal(p.shares)
 
-    realizedBasis = _realizedBasisForSymbol(instrument.symbol, activity)
+    realizedBasis = _realizedBasis(activityBySymbol.get(instrument.symbol, []))
     assert realizedBasis, "Invalid realizedBasis: %s for %s" % (
         realizedBasis,
         instrument,
@@ -129,39 +189,18 @@ def _parseVanguardPosition(p: _VanguardPosition, activity: List[Activity]) -> Po
 
 
 def _parsePositions(
-    path: Path, activity: List[Activity], lenient: bool = False
-) -> List[Position]:
-    with open(path, newline="") as csvfile:
-        criterion = csvsectionslicer.CSVSectionCriterion(
-            startSectionRowMatch=["Account Number"],
-            endSectionRowMatch=[],
-            rowFilter=lambda r: r[1:6],
-        )
-        sections = csvsectionslicer.parseSectionsForCSV(csvfile, [criterion])
-
-        if len(sections) == 0:
-            return []
-
-        vanPositions = (_VanguardPosition._make(r) for r in sections[0].rows)
-        vanPosAndBases = list(
-            map(lambda pos: _VanguardPositionAndActivity(pos, activity), vanPositions)
-        )
-
-        return list(
-            parsetools.lenientParse(
-                vanPosAndBases,
-                transform=_parseVanguardPositionAndActivity,
-                lenient=lenient,
-            )
-        )
-
-
-def _parsePositionsAndActivity(
-    path: Path, lenient: bool = False
-) -> PositionsAndActivity:
-    activity = _parseTransactions(path, lenient=lenient)
-    positions = _parsePositions(path, activity=activity, lenient=lenient)
-    return PositionsAndActivity(positions, activity)
+    section: csvsectionslicer.CSVSectionResult,
+    activity: Iterable[Activity],
+    instruments: _InstrumentCache,
+    lenient: bool = False,
+) -> Iterable[Position]:
+    activityBySymbol = _activityBySymbol(activity)
+
+    return _parseRows(
+        map(_VanguardPosition._make, section.rows),
+        transform=lambda p: _parseVanguardPosition(p, activityBySymbol, instruments),
+        lenient=lenient,
+    )
 
 
 class _VanguardTransaction(NamedTuple):
@@ -180,99 +219,144 @@ class _VanguardTransaction(NamedTuple):
     accountType: str
 
 
+_FLAGS_BY_TRANSACTION_TYPE: Dict[str, TradeFlags] = {
+    "Buy": TradeFlags.OPEN,
+    "Sell": TradeFlags.CLOSE,
+    "Reinvestment": TradeFlags.OPEN | TradeFlags.DRIP,
+    "Corp Action (Redemption)": TradeFlags.CLOSE,
+    "Transfer (outgoing)": TradeFlags.CLOSE,
+}
+
+# Rows of any other transaction type are skipped before being parsed at all.
+_PARSED_TRANSACTION_TYPES = frozenset(_FLAGS_BY_TRANSACTION_TYPE) | {"Dividend"}
+_TRANSACTION_TYPE_INDEX = _VanguardTransaction._fields.index("transactionType")
+
+
+# Mirrors the ASCII forms accepted by datetime.strptime(datestr, "%m/%d/%Y"),
+# including a space-padded day, without strptime's per-call locale handling.
+# Unlike strptime, non-ASCII digits are rejected.
+_DATE_REGEX = re.compile(r"(\d{1,2})/(\d{1,2}| [1-9])/(\d{4})", re.ASCII)
+
+
 def _parseVanguardTransactionDate(datestr: str) -> datetime:
-    return datetime.strptime(datestr, "%m/%d/%Y")
+    match = _DATE_REGEX.fullmatch(datestr)
+    if not match:
+        raise ValueError(f"Expected date in MM/DD/YYYY format: {datestr}")
+
+    month, day, year = match.groups()
+    return datetime(int(year), int(month), int(day))
 
 
 def _forceParseVanguardTransaction(
-    t: _VanguardTransaction, flags: TradeFlags
+    t: _VanguardTransaction, flags: TradeFlags, instruments: _InstrumentCache
 ) -> Optional[Trade]:
-    instrument: Instrument
-    if len(t.symbol) > 0:
-        instrument = Stock(t.symbol, currency=Currency.USD)
-    else:
-        instrument = _guessInstrumentForInvestmentName(t.investmentName)
+    instrument = _instrumentForSymbolOrName(t.symbol, t.investmentName, instruments)
 
-    totalFees = Decimal(t.commissionFees)
-    amount = Decimal(t.principalAmount)
+    totalFees = _parseDecimal(t.commissionFees)
+    amount = _parseDecimal(t.principalAmount)
 
+    shares = _parseDecimal(t.shares)
     if t.transactionDescription == "Redemption":
-        shares = Decimal(t.shares) * (-1)
-    else:
-        shares = Decimal(t.shares)
+        shares = -shares
 
     return Trade(
         date=_parseVanguardTransactionDate(t.tradeDate),
         instrument=instrument,
         quantity=shares,
-        amount=Cash(currency=Currency.USD, quantity=amount),
-        fees=Cash(currency=Currency.USD, quantity=totalFees),
+        amount=Cash(currency=_USD, quantity=amount),
+        fees=Cash(currency=_USD, quantity=totalFees) if totalFees else _ZERO_USD,
         flags=flags,
     )
 
 
-def _parseVanguardTransaction(t: _VanguardTransaction) -> Optional[Activity]:
+def _parseVanguardTransaction(
+    t: _VanguardTransaction, instruments: _InstrumentCache
+) -> Optional[Activity]:
     if t.transactionType == "Dividend":
         return CashPayment(
             date=_parseVanguardTransactionDate(t.tradeDate),
-            instrument=Stock(
-                t.symbol if t.symbol else t.investmentName, currency=Currency.USD
-            ),
-            proceeds=Cash(currency=Currency.USD, quantity=Decimal(t.netAmount)),
+            instrument=Stock(t.symbol if t.symbol else t.investmentName, currency=_USD),
+            proceeds=Cash(currency=_USD, quantity=_parseDecimal(t.netAmount)),
         )
 
-    validTransactionTypes = set(
-        [
-            "Buy",
-            "Sell",
-            "Reinvestment",
-            "Corp Action (Redemption)",
-            "Transfer (outgoing)",
-        ]
-    )
-
-    if t.transactionType not in validTransactionTypes:
+    flags = _FLAGS_BY_TRANSACTION_TYPE.get(t.transactionType)
+    if flags is None:
         return None
 
-    flagsByTransactionType = {
-        "Buy": TradeFlags.OPEN,
-        "Sell": TradeFlags.CLOSE,
-        "Reinvestment": TradeFlags.OPEN | TradeFlags.DRIP,
-        "Corp Action (Redemption)": TradeFlags.CLOSE,
-        "Transfer (outgoing)": TradeFlags.CLOSE,
-    }
+    return _forceParseVanguardTransaction(t, flags=flags, instruments=instruments)
 
-    return _forceParseVanguardTransaction(
-        t, flags=flagsByTransactionType[t.transactionType]
-    )
+
+_POSITIONS_CRITERION = csvsectionslicer.CSVSectionCriterion(
+    startSectionRowMatch=["Account Number"],
+    endSectionRowMatch=[],
+    rowFilter=lambda r: r[1:6],
+)
+
+_TRANSACTIONS_CRITERION = csvsectionslicer.CSVSectionCriterion(
+    startSectionRowMatch=["Account Number", "Trade Date"],
+    endSectionRowMatch=[],
+    rowFilter=lambda r: r[1:-1],
+)
 
 
 # Transactions will be ordered from newest to oldest
-def _parseTransactions(path: Path, lenient: bool = False) -> List[Activity]:
+def _parseTransactions(
+    section: csvsectionslicer.CSVSectionResult,
+    instruments: _InstrumentCache,
+    lenient: bool = False,
+) -> Iterable[Activity]:
+    rows = (
+        r
+        for r in section.rows
+        if r[_TRANSACTION_TYPE_INDEX] in _PARSED_TRANSACTION_TYPES
+    )
+
+    return _parseRows(
+        map(_VanguardTransaction._make, rows),
+        transform=lambda t: _parseVanguardTransaction(t, instruments),
+        lenient=lenient,
+    )
+
+
+def _parsePositionsAndActivity(
+    path: Path, lenient: bool = False
+) -> PositionsAndActivity:
+    # Read the statement once, slicing out both sections in file order.
     with open(path, newline="") as csvfile:
-        transactionsCriterion = csvsectionslicer.CSVSectionCriterion(
-            startSectionRowMatch=["Account Number", "Trade Date"],
-            endSectionRowMatch=[],
-            rowFilter=lambda r: r[1:-1],
+        sections = csvsectionslicer.parseSectionsForCSV(
+            csvfile, [_POSITIONS_CRITERION, _TRANSACTIONS_CRITERION]
         )
 
-        sections = csvsectionslicer.parseSectionsForCSV(
-            csvfile, [transactionsCriterion]
+    sectionsByCriterion = {s.criterion: s for s in sections}
+    instruments: _InstrumentCache = {}
+
+    transactionsSection = sectionsByCriterion.get(_TRANSACTIONS_CRITERION)
+    # Positions' cost bases need all activity up front, so materialize it first.
+    activity = (
+        list(
+            _parseTransactions(
+                transactionsSection, instruments=instruments, lenient=lenient
+            )
         )
+        if transactionsSection
+        else []
+    )
 
-        if len(sections) == 0:
-            return []
-
-        return list(
-            filter(
-                None,
-                parsetools.lenientParse(
-                    (_VanguardTransaction._make(r) for r in sections[0].rows),
-                    transform=_parseVanguardTransaction,
-                    lenient=lenient,
-                ),
+    positionsSection = sectionsByCriterion.get(_POSITIONS_CRITERION)
+    positions = (
+        list(
+            _parsePositions(
+                positionsSection,
+                activity=activity,
+                instruments=instruments,
+                lenient=lenient,
             )
         )
+        if positionsSection
+        else []
+    )
+
+    return PositionsAndActivity(positions, activity)
 
 
 class VanguardAccount(AccountData):
@@ -1,8 +1,9 @@
 import unittest
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from itertools import groupby
 from pathlib import Path
+from typing import List, Optional, Set
 
 import bankroll.brokers.vanguard as vanguard
 from bankroll.model import (
@@ -13,6 +14,8 @@ from bankroll.model import (
     CashPayment,
     Currency,
     Instrument,
+    Option,
+    OptionType,
     Position,
     Stock,
     Trade,
@@ -225,6 +228,137 @@ class TestVanguardTransactions(unittest.TestCase):
         )
 
 
+class TestVanguardParseIsolation(unittest.TestCase):
+    def parseAccount(self) -> vanguard.VanguardAccount:
+        return vanguard.VanguardAccount(
+            statement=Path("tests/vanguard_positions_and_transactions.csv")
+        )
+
+    def instrumentIDs(self, account: vanguard.VanguardAccount) -> Set[int]:
+        instruments: List[Optional[Instrument]] = [
+            p.instrument for p in account.positions()
+        ]
+        for a in account.activity():
+            if isinstance(a, (Trade, CashPayment)):
+                instruments.append(a.instrument)
+
+        return {id(i) for i in instruments if i is not None}
+
+    def test_parsesDoNotShareInstruments(self) -> None:
+        first = self.instrumentIDs(self.parseAccount())
+        second = self.instrumentIDs(self.parseAccount())
+        self.assertTrue(first)
+        self.assertFalse(first & second)
+
+    def test_mutationDoesNotLeakIntoLaterParses(self) -> None:
+        for p in self.parseAccount().positions():
+            if p.instrument.symbol == "VT":
+                p.instrument.exchange = "ARCA"
+
+        account = self.parseAccount()
+        for p in account.positions():
+            self.assertIsNone(p.instrument.exchange)
+        for a in account.activity():
+            if isinstance(a, Trade):
+                self.assertIsNone(a.instrument.exchange)
+
+
+class TestVanguardActivityBySymbol(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stock = Stock("SPY", Currency.USD)
+        self.option = Option(
+            underlying="SPY",
+            currency=Currency.USD,
+            optionType=OptionType.CALL,
+            expiration=date(2019, 6, 21),
+            strike=Decimal("300"),
+        )
+
+        self.stockTrade = Trade(
+            date=datetime(2019, 1, 2),
+            instrument=self.stock,
+            quantity=Decimal("10"),
+            amount=helpers.cashUSD(Decimal("-2500")),
+            fees=helpers.cashUSD(Decimal("0")),
+            flags=TradeFlags.OPEN,
+        )
+        self.optionTrade = Trade(
+            date=datetime(2019, 1, 3),
+            instrument=self.option,
+            quantity=Decimal("1"),
+            amount=helpers.cashUSD(Decimal("-150")),
+            fees=helpers.cashUSD(Decimal("1")),
+            flags=TradeFlags.OPEN,
+        )
+        self.dividend = CashPayment(
+            date=datetime(2019, 3, 20),
+            instrument=self.stock,
+            proceeds=helpers.cashUSD(Decimal("13.50")),
+        )
+        self.interest = CashPayment(
+            date=datetime(2019, 3, 31),
+            instrument=None,
+            proceeds=helpers.cashUSD(Decimal("2.25")),
+        )
+
+        self.activityBySymbol = vanguard.account._activityBySymbol(
+            [self.stockTrade, self.optionTrade, self.dividend, self.interest]
+        )
+
+    def test_optionTradeAffectsUnderlying(self) -> None:
+        self.assertEqual(
+            self.activityBySymbol["SPY"],
+            [self.stockTrade, self.optionTrade, self.dividend],
+        )
+
+    def test_optionTradeAffectsOwnSymbol(self) -> None:
+        self.assertEqual(self.activityBySymbol[self.option.symbol], [self.optionTrade])
+
+    def test_paymentWithoutInstrumentIsSkipped(self) -> None:
+        self.assertEqual(set(self.activityBySymbol), {"SPY", self.option.symbol})
+
+
+class TestVanguardTransactionDates(unittest.TestCase):
+    def test_paddedDate(self) -> None:
+        self.assertEqual(
+            vanguard.account._parseVanguardTransactionDate("09/03/2017"),
+            datetime(2017, 9, 3),
+        )
+
+    def test_unpaddedDate(self) -> None:
+        self.assertEqual(
+            vanguard.account._parseVanguardTransactionDate("9/3/2017"),
+            datetime(2017, 9, 3),
+        )
+
+    def test_spacePaddedDay(self) -> None:
+        self.assertEqual(
+            vanguard.account._parseVanguardTransactionDate("09/ 3/2017"),
+            datetime(2017, 9, 3),
+        )
+
+    def test_malformedDates(self) -> None:
+        for datestr in [
+            "",
+            "2017-09-03",
+            "09/03/17",
+            "09/03/ 201",
+            " 09/03/2017",
+            "09/03/2017 ",
+            " 9/03/2017",
+            "09/ 13/2017",
+            "09/3 /2017",
+            "+9/03/2017",
+            "1_0/03/2017",
+            "123/03/2017",
+            "13/03/2017",
+            "02/30/2017",
+        ]:
+            with self.subTest(datestr=datestr):
+                with self.assertRaises(ValueError):
+                    vanguard.account._parseVanguardTransactionDate(datestr)
+
+
 class TestVanguardBalance(unittest.TestCase):
     def setUp(self) -> None:
         self.balance = vanguard.VanguardAccount(